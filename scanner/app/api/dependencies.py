@@ -1,23 +1,163 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer, SecurityScopes
 from jwt import PyJWTError
 from pydantic import ValidationError
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 
 from app.api.routes.v1 import AUTH_ROUTER_PREFIX
-from app.core.database import get_db
-from app.core.security import decode_jwt_token
-from app.core.utils import get_current_datetime
+from app.core.admission import admission_controller
+from app.core.api_keys import CachedApiKey, api_key_cache, api_key_usage
+from app.core.database import get_db, get_read_db
+from app.core.security import (
+    API_KEY_PREFIX,
+    decode_jwt_token,
+    parse_api_key,
+    verify_api_key_secret,
+)
+from app.core.utils import get_current_datetime, normalize_ip_address
+from app.db.models.api_key import ApiKey
 from app.db.models.token import Token
 from app.db.models.user import User
 from app.schemas.token import TokenPayload
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{AUTH_ROUTER_PREFIX}/login")
+oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{AUTH_ROUTER_PREFIX}/login", auto_error=False
+)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+
+def record_queue_delay(request: Request) -> None:
+    """
+    Sync on purpose: it runs on a worker thread, so the time since admission
+    is how long the request waited for the threadpool.
+    """
+    admitted_at = getattr(request.state, "admitted_at", None)
+    if admitted_at is None:
+        return
+    admission_controller.record_queue_delay(
+        request.state.route_class, time.monotonic() - admitted_at
+    )
+
+
+def _get_token_with_user(db: Session, token: str) -> Optional[Row]:
+    return (
+        db.query(Token, User)
+        .outerjoin(User, Token.user_id == User.id)
+        .filter(Token.token == token)
+        .first()
+    )
+
+
+def _get_api_key_with_user(db: Session, prefix: str) -> Optional[Row]:
+    return (
+        db.query(ApiKey, User)
+        .outerjoin(User, ApiKey.user_id == User.id)
+        .filter(ApiKey.prefix == prefix)
+        .first()
+    )
 
 
 def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    request: Request,
+    security_scopes: SecurityScopes,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    token: Optional[str] = Depends(oauth2_scheme),
+    api_key: Optional[str] = Depends(api_key_header),
 ) -> User:
+    """
+    Accept a JWT or an API key, either as a bearer token or in X-API-Key.
+    API keys must hold every scope the route requires, JWT sessions hold all.
+    The key's scopes are left on request.state.api_key_scopes for routes that
+    must not grant more than the caller holds.
+    """
+    if token and token.startswith(f"{API_KEY_PREFIX}_"):
+        api_key = token
+    if api_key:
+        return _get_api_key_user(request, db, read_db, api_key, security_scopes)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return _get_jwt_user(db, read_db, token)
+
+
+def _get_api_key_user(
+    request: Request,
+    db: Session,
+    read_db: Session,
+    key: str,
+    security_scopes: SecurityScopes,
+) -> User:
+    """
+    One indexed lookup by public prefix (none when cached) and a constant
+    time compare of the secret's HMAC. Usage is stored in batches later.
+    """
+    invalid_key = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid API key",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    parsed = parse_api_key(key)
+    if parsed is None:
+        raise invalid_key
+    prefix, secret = parsed
+
+    user = None
+    hit, entry = api_key_cache.get(prefix)
+    if not hit:
+        row = _get_api_key_with_user(read_db, prefix)
+        if row is None and read_db is not db:
+            # Read your own write: the key may not be on the replica yet
+            row = _get_api_key_with_user(db, prefix)
+        if row is not None:
+            entry, user = CachedApiKey.from_model(row[0]), row[1]
+        api_key_cache.set(prefix, entry)
+
+    if entry is None or not verify_api_key_secret(secret, entry.key_hash):
+        raise invalid_key
+    if entry.expires_at is not None and entry.expires_at < get_current_datetime():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="API key expired",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not set(security_scopes.scopes) <= entry.scopes:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+            headers={"WWW-Authenticate": f'Bearer scope="{security_scopes.scope_str}"'},
+        )
+
+    if user is None:
+        user = read_db.get(User, entry.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    api_key_usage.record(entry.id)
+    request.state.api_key_scopes = entry.scopes
+    return user
+
+
+def _get_jwt_user(db: Session, read_db: Session, token: str) -> User:
+    """
+    Authenticate the request against a read replica. Tokens minted moments ago
+    may not have replicated yet, so a miss is retried on the primary. The
+    returned user is attached to the read session, which is the primary
+    session only when no replica is healthy: reload it from the primary
+    before modifying it.
+
+    Costs one joined SELECT and one UPDATE. A replica miss adds a second
+    SELECT.
+    """
     try:
         payload = decode_jwt_token(token)
         if payload is None:
@@ -37,16 +177,20 @@ def get_current_user(
             )
 
         # Check if the ip address matches
-        db_token = db.query(Token).filter(Token.token == token).first()
-        if db_token is None:
+        row = _get_token_with_user(read_db, token)
+        if row is None and read_db is not db:
+            # Read your own write: the token may not be on the replica yet
+            row = _get_token_with_user(db, token)
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        ip_address = token_data.ip_address
-        if ip_address != db_token.ip_address:
+        db_token, user = row
+        ip_address = normalize_ip_address(token_data.ip_address)
+        if ip_address != normalize_ip_address(db_token.ip_address):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid IP address",
@@ -60,30 +204,35 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Get user from database
-    user = db.query(User).filter(User.id == int(token_data.user_id)).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    # Update token's last_used_at timestamp
-    db_token = db.query(Token).filter(Token.token == token).first()
-    if db_token is None:
+    # Update token's last_used_at timestamp on the primary
+    updated = (
+        db.query(Token)
+        .filter(Token.id == db_token.id)
+        .update({Token.last_used_at: get_current_datetime()})
+    )
+    if not updated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    if db_token:
-        db_token.last_used_at = get_current_datetime()
+    # The user was loaded in this transaction, keep it usable without a reload
+    expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+    try:
         db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
 
     return user
 
 
 def get_current_active_superuser(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Security(get_current_user, scopes=["admin"]),
 ) -> User:
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not enough permissions")
@@ -1,6 +1,8 @@
-from app.api.routes.v1 import auth, users
-from fastapi import APIRouter
+from app.api.dependencies import record_queue_delay
+from app.api.routes.v1 import api_keys, auth, users
+from fastapi import APIRouter, Depends
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(record_queue_delay)])
 router.include_router(auth.router)
 router.include_router(users.router)
+router.include_router(api_keys.router)
@@ -1,2 +1,3 @@
 AUTH_ROUTER_PREFIX = "/api/v1/auth"
 USER_ROUTER_PREFIX = "/api/v1/users"
+API_KEY_ROUTER_PREFIX = "/api/v1/api-keys"
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Security
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_user
+from app.api.routes.v1 import API_KEY_ROUTER_PREFIX
+from app.core.api_keys import api_key_cache
+from app.core.database import get_db
+from app.core.query_budget import query_budget
+from app.core.security import generate_api_key, hash_api_key_secret
+from app.core.utils import get_current_datetime
+from app.db.models.api_key import ApiKey
+from app.db.models.user import User
+from app.schemas.api_key import ApiKey as ApiKeySchema
+from app.schemas.api_key import ApiKeyCreate, ApiKeyCreated
+
+router = APIRouter(prefix=API_KEY_ROUTER_PREFIX, tags=["api-keys"])
+
+
+@router.post("/", response_model=ApiKeyCreated)
+@query_budget(6)
+def create_api_key(
+    request: Request,
+    key_in: ApiKeyCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Security(get_current_user, scopes=["api-keys"]),
+) -> Any:
+    """
+    Create an API key for the current user. The key is only returned here.
+    A key can only create keys with a subset of its own scopes.
+    """
+    if "admin" in key_in.scopes and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    caller_scopes = getattr(request.state, "api_key_scopes", None)
+    if caller_scopes is not None and not set(key_in.scopes) <= caller_scopes:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    key, prefix, secret = generate_api_key()
+    expires_at = None
+    if key_in.expires_in_days:
+        expires_at = get_current_datetime() + timedelta(days=key_in.expires_in_days)
+
+    db_api_key = ApiKey(
+        name=key_in.name,
+        prefix=prefix,
+        key_hash=hash_api_key_secret(secret),
+        scopes=" ".join(key_in.scopes),
+        expires_at=expires_at,
+        user_id=current_user.id,
+    )
+    db.add(db_api_key)
+    db.commit()
+    db.refresh(db_api_key)
+    # A lookup of this prefix may have been cached as unknown
+    api_key_cache.invalidate(prefix)
+
+    api_key = ApiKeySchema.model_validate(db_api_key)
+    return ApiKeyCreated(**api_key.model_dump(), key=key)
+
+
+@router.get("/", response_model=List[ApiKeySchema])
+@query_budget(5)
+def read_api_keys(
+    db: Session = Depends(get_db),
+    current_user: User = Security(get_current_user, scopes=["api-keys"]),
+) -> Any:
+    """
+    List the current user's API keys. Read from the primary so that a key
+    just created or revoked is listed as such.
+    """
+    return db.query(ApiKey).filter(ApiKey.user_id == current_user.id).all()
+
+
+@router.delete("/{api_key_id}")
+@query_budget(6)
+def revoke_api_key(
+    api_key_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Security(get_current_user, scopes=["api-keys"]),
+) -> Any:
+    """
+    Revoke one of the current user's API keys. Other workers may keep
+    accepting it until their cache entry expires (API_KEY_CACHE_SECONDS).
+    """
+    db_api_key = (
+        db.query(ApiKey)
+        .filter(ApiKey.id == api_key_id, ApiKey.user_id == current_user.id)
+        .first()
+    )
+    if db_api_key is None:
+        raise HTTPException(status_code=404, detail="API key not found")
+
+    prefix = db_api_key.prefix
+    db.delete(db_api_key)
+    db.commit()
+    api_key_cache.invalidate(prefix)
+    return {"detail": "API key revoked"}
@@ -3,17 +3,21 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_current_active_superuser
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.ip_filter import reload_ip_filter
+from app.core.query_budget import query_budget
 from app.core.security import (
     create_jwt_token,
     create_token_object,
     get_password_hash,
     verify_password,
 )
+from app.core.utils import normalize_ip_address
 from app.db.models.token import Token
 from app.db.models.user import User
 from app.schemas.token import Token as TokenSchema
@@ -25,7 +29,25 @@ AUTH_ROUTER_PREFIX = "/api/v1/auth"
 router = APIRouter(prefix=AUTH_ROUTER_PREFIX, tags=["auth"])
 
 
+def _add_user(db: Session, db_user: User) -> None:
+    """
+    Insert the user and let the unique constraints on username and email
+    reject duplicates, instead of checking for an existing user first.
+    """
+    db.add(db_user)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="User with this email or username already exists",
+        )
+    db.refresh(db_user)
+
+
 @router.post("/register", response_model=UserSchema)
+@query_budget(2)
 def register_new_user(
     user_in: UserCreate,
     db: Session = Depends(get_db),
@@ -33,18 +55,6 @@ def register_new_user(
     """
     Create new user.
     """
-    # Check if user exists
-    user = (
-        db.query(User)
-        .filter((User.email == user_in.email) | (User.username == user_in.username))
-        .first()
-    )
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="User with this email or username already exists",
-        )
-
     # Create new user
     db_user = User(
         email=user_in.email,
@@ -53,13 +63,12 @@ def register_new_user(
         is_active=True,
         is_superuser=False,
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _add_user(db, db_user)
     return db_user
 
 
 @router.post("/register-admin", response_model=UserSchema)
+@query_budget(2)
 def register_admin_user(user_in: UserCreateAdmin, db: Session = Depends(get_db)) -> Any:
     if not verify_password(user_in.master_password, settings.MASTER_PASSWORD_HASH):
         raise HTTPException(
@@ -67,18 +76,6 @@ def register_admin_user(user_in: UserCreateAdmin, db: Session = Depends(get_db))
             detail="Invalid master password",
         )
 
-    # Check if user exists
-    user = (
-        db.query(User)
-        .filter((User.email == user_in.email) | (User.username == user_in.username))
-        .first()
-    )
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="User with this email or username already exists",
-        )
-
     # Create new user
     db_user = User(
         email=user_in.email,
@@ -88,9 +85,7 @@ def register_admin_user(user_in: UserCreateAdmin, db: Session = Depends(get_db))
         is_superuser=True,
     )
 
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _add_user(db, db_user)
     user_in_db = UserSchema(
         email=db_user.email,
         username=db_user.username,
@@ -101,6 +96,7 @@ def register_admin_user(user_in: UserCreateAdmin, db: Session = Depends(get_db))
 
 
 @router.post("/register-superuser", response_model=UserSchema)
+@query_budget(6)
 def register_superuser(
     user_in: UserCreate,
     db: Session = Depends(get_db),
@@ -112,18 +108,6 @@ def register_superuser(
             detail="You do not have permission to perform this action",
         )
 
-    # Check if user exists
-    user = (
-        db.query(User)
-        .filter((User.email == user_in.email) | (User.username == user_in.username))
-        .first()
-    )
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="User with this email or username already exists",
-        )
-
     db_user = User(
         email=user_in.email,
         username=user_in.username,
@@ -132,13 +116,13 @@ def register_superuser(
         is_superuser=True,
     )
 
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _add_user(db, db_user)
     return db_user
 
 
 @router.post("/login", response_model=TokenSchema)
+# Two more when the compact token schema interns a new user agent
+@query_budget(4)
 def login_for_access_token(
     request: Request,
     db: Session = Depends(get_db),
@@ -156,7 +140,7 @@ def login_for_access_token(
         raise HTTPException(status_code=400, detail="Inactive user")
 
     # Get client info
-    ip_address = request.client.host
+    ip_address = normalize_ip_address(request.client.host)
     user_agent = request.headers.get("User-Agent", "")
 
     # Create token payload
@@ -191,6 +175,7 @@ def login_for_access_token(
 
 
 @router.post("/logout")
+@query_budget(2)
 def logout(
     request: Request,
     db: Session = Depends(get_db),
@@ -212,3 +197,19 @@ def logout(
         return {"detail": "Successfully logged out"}
 
     return {"detail": "Token not found or already invalidated"}
+
+
+@router.post("/ip-filter/reload")
+@query_budget(5)
+def reload_ip_filter_lists(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Recompile the IP allow/deny lists and trusted proxies from the settings.
+    Only reloads the worker serving the request, send SIGHUP to reload all.
+    """
+    try:
+        reload_ip_filter()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid IP filter: {e}")
+    return {"detail": "IP filter reloaded"}
@@ -1,11 +1,12 @@
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Security
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_current_active_superuser, get_current_user
 from app.api.routes.v1 import USER_ROUTER_PREFIX
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.query_budget import query_budget
 from app.db.models.user import User
 from app.schemas.user import User as UserSchema
 from app.schemas.user import UserUpdate
@@ -14,8 +15,9 @@ router = APIRouter(prefix=USER_ROUTER_PREFIX, tags=["users"])
 
 
 @router.get("/me", response_model=UserSchema)
+@query_budget(4)
 def read_user_me(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Security(get_current_user, scopes=["users:read"]),
 ) -> Any:
     """
     Get current user.
@@ -24,15 +26,19 @@ def read_user_me(
 
 
 @router.put("/me", response_model=UserSchema)
+@query_budget(6)
 def update_user_me(
     *,
     db: Session = Depends(get_db),
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Security(get_current_user, scopes=["users:write"]),
 ) -> Any:
     """
     Update current user.
     """
+    # current_user may come from a replica, modify the primary's copy
+    current_user = db.get(User, current_user.id)
+
     # Update user fields
     for field, value in user_in.model_dump(exclude_unset=True).items():
         if field == "is_superuser" and value and not current_user.is_superuser:
@@ -57,8 +63,9 @@ def update_user_me(
 
 # Admin-only endpoint example
 @router.get("/", response_model=List[UserSchema])
+@query_budget(5)
 def read_users(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_active_superuser),
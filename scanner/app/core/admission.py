@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from anyio.to_thread import current_default_thread_limiter
+
+from app.api.routes.v1 import AUTH_ROUTER_PREFIX
+from app.core.config import settings
+
+AUTH_HEAVY = "auth"
+LIGHT = "light"
+
+# Routes that pay for bcrypt before answering
+AUTH_HEAVY_PATHS = [
+    f"{AUTH_ROUTER_PREFIX}/login",
+    f"{AUTH_ROUTER_PREFIX}/register",
+]
+
+# Never shed, load balancers must always get an answer
+EXEMPT_PATHS = ["/health"]
+
+# Weight of the newest sample in the queueing delay moving average
+_DELAY_EWMA_WEIGHT = 0.2
+# The average halves every second without samples, so a spike can't keep
+# shedding once admitted requests stop reporting delay
+_DELAY_HALF_LIFE_SECONDS = 1.0
+
+
+class RouteClassStats:
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.shed = 0
+        self._queue_delay = 0.0
+        self._sampled_at = time.monotonic()
+
+    def queue_delay(self, now: Optional[float] = None) -> float:
+        elapsed = (time.monotonic() if now is None else now) - self._sampled_at
+        return self._queue_delay * 0.5 ** (elapsed / _DELAY_HALF_LIFE_SECONDS)
+
+    def record_queue_delay(self, delay: float) -> None:
+        now = time.monotonic()
+        current = self.queue_delay(now)
+        self._queue_delay = current + _DELAY_EWMA_WEIGHT * (delay - current)
+        self._sampled_at = now
+
+    def is_saturated(self) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            return True
+        return (
+            self.in_flight > 0
+            and self.queue_delay() > settings.ADMISSION_MAX_QUEUE_DELAY_SECONDS
+        )
+
+
+class AdmissionController:
+    """
+    Tracks in-flight requests and threadpool queueing delay per route class,
+    and decides whether a new request is admitted or shed.
+
+    Admission decisions and threadpool statistics must be taken on the event
+    loop, queueing delay samples may be recorded from worker threads.
+    """
+
+    def __init__(self):
+        self.classes = {
+            AUTH_HEAVY: RouteClassStats(settings.ADMISSION_AUTH_MAX_IN_FLIGHT),
+            LIGHT: RouteClassStats(settings.ADMISSION_LIGHT_MAX_IN_FLIGHT),
+        }
+        self._lock = threading.Lock()
+        self._health_saturated = False
+        self._health_changing_since: Optional[float] = None
+
+    @staticmethod
+    def classify(path: str) -> Optional[str]:
+        if any(path.startswith(p) for p in EXEMPT_PATHS):
+            return None
+        if any(path.startswith(p) for p in AUTH_HEAVY_PATHS):
+            return AUTH_HEAVY
+        return LIGHT
+
+    @staticmethod
+    def threadpool_statistics() -> Dict[str, int]:
+        statistics = current_default_thread_limiter().statistics()
+        return {
+            "busy": statistics.borrowed_tokens,
+            "size": int(statistics.total_tokens),
+            "waiting": statistics.tasks_waiting,
+        }
+
+    def try_admit(self, route_class: str) -> bool:
+        stats = self.classes[route_class]
+        shed = stats.is_saturated()
+        # Expensive work is shed first as soon as the threadpool is full,
+        # so that light requests do not queue behind it
+        if route_class == AUTH_HEAVY and self.threadpool_statistics()["waiting"]:
+            shed = True
+        if shed:
+            stats.shed += 1
+            return False
+        stats.in_flight += 1
+        return True
+
+    def release(self, route_class: str) -> None:
+        self.classes[route_class].in_flight -= 1
+
+    def record_queue_delay(self, route_class: str, delay: float) -> None:
+        with self._lock:
+            self.classes[route_class].record_queue_delay(delay)
+
+    def is_saturated(self) -> bool:
+        return (
+            self.classes[LIGHT].is_saturated()
+            or self.threadpool_statistics()["waiting"] > 0
+        )
+
+    def health_saturated(self) -> bool:
+        """
+        Saturation as reported to load balancers. It only flips once the
+        instantaneous signal has disagreed with it for
+        ADMISSION_HEALTH_HOLD_SECONDS, so momentary spikes don't flap.
+        """
+        now = time.monotonic()
+        if self.is_saturated() == self._health_saturated:
+            self._health_changing_since = None
+        elif self._health_changing_since is None:
+            self._health_changing_since = now
+        if (
+            self._health_changing_since is not None
+            and now - self._health_changing_since
+            >= settings.ADMISSION_HEALTH_HOLD_SECONDS
+        ):
+            self._health_saturated = not self._health_saturated
+            self._health_changing_since = None
+        return self._health_saturated
+
+    def snapshot(self) -> Dict[str, Any]:
+        classes: Dict[str, Any] = {}
+        for name, stats in self.classes.items():
+            classes[name] = {
+                "in_flight": stats.in_flight,
+                "max_in_flight": stats.max_in_flight,
+                "queue_delay_ms": round(stats.queue_delay() * 1000, 1),
+                "shed": stats.shed,
+                "saturated": stats.is_saturated(),
+            }
+        return {
+            "saturated": self.is_saturated(),
+            "health_saturated": self.health_saturated(),
+            "threadpool": self.threadpool_statistics(),
+            "classes": classes,
+        }
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.utils import get_current_datetime
+from app.db.models.api_key import ApiKey
+
+logger = logging.getLogger(__name__)
+
+_CACHE_SIZE = 10_000
+
+
+class CachedApiKey(NamedTuple):
+    id: int
+    user_id: int
+    key_hash: str
+    scopes: FrozenSet[str]
+    expires_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, api_key: ApiKey) -> "CachedApiKey":
+        expires_at = api_key.expires_at
+        # SQLite returns naive datetimes, they are stored in UTC
+        if expires_at is not None and expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return cls(
+            id=api_key.id,
+            user_id=api_key.user_id,
+            key_hash=api_key.key_hash,
+            scopes=frozenset(api_key.scopes.split()),
+            expires_at=expires_at,
+        )
+
+
+class ApiKeyCache:
+    """
+    Lookup results by public prefix, unknown prefixes included so that
+    guessing keys does not reach the database. Entries live
+    API_KEY_CACHE_SECONDS, the least recently used go first once it's full so
+    a flood of unknown prefixes can't evict the keys in use all at once.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, Optional[CachedApiKey]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, prefix: str) -> Tuple[bool, Optional[CachedApiKey]]:
+        """Return (hit, entry), a hit with a None entry is an unknown prefix."""
+        with self._lock:
+            cached = self._entries.get(prefix)
+            if cached is not None:
+                self._entries.move_to_end(prefix)
+        if cached is None:
+            return False, None
+        cached_at, entry = cached
+        if time.monotonic() - cached_at > settings.API_KEY_CACHE_SECONDS:
+            return False, None
+        return True, entry
+
+    def set(self, prefix: str, entry: Optional[CachedApiKey]) -> None:
+        with self._lock:
+            self._entries[prefix] = (time.monotonic(), entry)
+            self._entries.move_to_end(prefix)
+            while len(self._entries) > _CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix: str) -> None:
+        with self._lock:
+            self._entries.pop(prefix, None)
+
+
+class ApiKeyUsageRecorder:
+    """
+    Collects last-used times in memory and writes them in one batched UPDATE
+    every API_KEY_USAGE_FLUSH_SECONDS from a background thread, keeping the
+    write off the request path.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, api_key_id: int) -> None:
+        with self._lock:
+            self._pending[api_key_id] = get_current_datetime()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="api-key-usage", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(settings.API_KEY_USAGE_FLUSH_SECONDS)
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        table = ApiKey.__table__
+        statement = (
+            table.update()
+            .where(table.c.id == bindparam("api_key_id"))
+            .values(last_used_at=bindparam("used_at"))
+        )
+        db = SessionLocal()
+        try:
+            db.execute(
+                statement,
+                [
+                    {"api_key_id": api_key_id, "used_at": used_at}
+                    for api_key_id, used_at in pending.items()
+                ],
+            )
+            db.commit()
+        except Exception:
+            logger.exception("Could not store API key usage, retrying later")
+            with self._lock:
+                for api_key_id, used_at in pending.items():
+                    self._pending.setdefault(api_key_id, used_at)
+        finally:
+            db.close()
+
+
+api_key_cache = ApiKeyCache()
+api_key_usage = ApiKeyUsageRecorder()
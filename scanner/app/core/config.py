@@ -1,20 +1,53 @@
 import os
 from functools import lru_cache
+from typing import List
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
+def split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Scanner"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     TOKEN_REFRESH_THRESHOLD_PERCENT: float = 0.1  # 10% of the total lifetime
     TOKEN_TABLE: str = os.environ.get("TOKEN_TABLE")
+    # Opt-in compact token rows: interned user agents, packed IPs, epoch seconds
+    COMPACT_TOKEN_SCHEMA: bool = False
+    USER_AGENT_TABLE: str = os.environ.get("USER_AGENT_TABLE", "user_agents")
     API_VERSION: str = os.environ.get("API_VERSION", "v1")
     DATABASE_URL: str = os.environ.get("DATABASE_URL")
+    # Comma separated list of read replica URLs, reads go to the primary if empty
+    DATABASE_REPLICA_URLS: str = os.environ.get("DATABASE_REPLICA_URLS", "")
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+    # Raise instead of logging when an endpoint exceeds its query budget (tests)
+    QUERY_BUDGET_STRICT: bool = False
+    # Admission control, requests over these limits get a 503 with Retry-After
+    ADMISSION_AUTH_MAX_IN_FLIGHT: int = 8
+    ADMISSION_LIGHT_MAX_IN_FLIGHT: int = 64
+    ADMISSION_MAX_QUEUE_DELAY_SECONDS: float = 0.5
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    # /health only turns saturated (or back) after this long in the new state
+    ADMISSION_HEALTH_HOLD_SECONDS: float = 5.0
+    # Comma separated CIDRs, the most specific match wins and deny wins ties.
+    # With an empty allowlist every address not denied is allowed.
+    IP_ALLOWLIST: str = os.environ.get("IP_ALLOWLIST", "")
+    IP_DENYLIST: str = os.environ.get("IP_DENYLIST", "")
+    # Proxies whose X-Forwarded-For header is trusted
+    TRUSTED_PROXIES: str = os.environ.get("TRUSTED_PROXIES", "")
     HASHING_ALGORITHM: str = os.environ.get("HASHING_ALGORITHM")
     SECRET_KEY: str = os.environ.get("SECRET_KEY")
     USER_TABLE: str = os.environ.get("USER_TABLE")
+    API_KEY_TABLE: str = os.environ.get("API_KEY_TABLE", "api_keys")
+    # Keys the API key hashes, separate from SECRET_KEY so that either can be
+    # rotated alone. Changing it invalidates every stored API key.
+    API_KEY_HMAC_SECRET: str = os.environ.get("API_KEY_HMAC_SECRET")
+    # Validated keys are cached, revocation takes up to this long elsewhere
+    API_KEY_CACHE_SECONDS: int = 60
+    API_KEY_USAGE_FLUSH_SECONDS: int = 30
     MASTER_PASSWORD_HASH: str = os.environ.get("MASTER_PASSWORD_HASH")
 
     @field_validator(
@@ -23,6 +56,7 @@ class Settings(BaseSettings):
         "DATABASE_URL",
         "HASHING_ALGORITHM",
         "SECRET_KEY",
+        "API_KEY_HMAC_SECRET",
         "USER_TABLE",
         "MASTER_PASSWORD_HASH",
         mode="before",
@@ -32,6 +66,10 @@ class Settings(BaseSettings):
             raise ValueError(f"{field} is not set")
         return value
 
+    @property
+    def database_replica_urls(self) -> List[str]:
+        return split_list(self.DATABASE_REPLICA_URLS)
+
     class Config:
         env_file = "dev.env"
         env_file_encoding = "utf-8"
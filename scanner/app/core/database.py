@@ -1,21 +1,154 @@
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
 from app.core.config import settings
-from sqlalchemy import create_engine
+from app.core.query_budget import ignore_queries
+from fastapi import Depends
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+
+def _create_engine(url: str) -> Engine:
+    return create_engine(url=url, connect_args={"check_same_thread": False})
+
 
-engine = create_engine(
-    url=settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = _create_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+class Replica:
+    """A read replica engine and its last known health."""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = _create_engine(url)
+        self.session_factory = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine, class_=ReplicaSession
+        )
+        self.healthy = True
+
+    def check(self) -> bool:
+        try:
+            # Periodic pings are not part of any endpoint's query budget
+            with ignore_queries(), self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            self.healthy = True
+        except Exception:
+            self.healthy = False
+        return self.healthy
+
+    def mark_down(self) -> None:
+        # The health monitor brings it back once a ping succeeds
+        self.healthy = False
+
+
+class ReplicaSession(Session):
+    """
+    Session bound to a replica. A statement failing with OperationalError
+    marks the replica down and is retried once on the primary, along with
+    the rest of the session's work.
+    """
+
+    replica: Optional[Replica] = None
+
+    def execute(self, *args, **kwargs):
+        try:
+            return super().execute(*args, **kwargs)
+        except OperationalError:
+            if self.replica is None:
+                raise
+            self.replica.mark_down()
+            self.rollback()
+            self.bind = engine
+            self.replica = None
+            return super().execute(*args, **kwargs)
+
+
+replicas: List[Replica] = [
+    Replica(f"replica-{index}", url)
+    for index, url in enumerate(settings.database_replica_urls)
+]
+
+_replica_cycle = itertools.count()
+_monitor_lock = threading.Lock()
+_monitor: Optional[threading.Thread] = None
+
+
+def check_replica_health() -> Dict[str, bool]:
+    """Ping every replica now and return the health of each one."""
+    for replica in replicas:
+        replica.check()
+    return get_replica_health()
+
+
+def get_replica_health() -> Dict[str, bool]:
+    """Last known health of each replica, without pinging them."""
+    return {replica.name: replica.healthy for replica in replicas}
+
+
+def _monitor_replicas() -> None:
+    while True:
+        time.sleep(settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS)
+        check_replica_health()
+
+
+def start_replica_monitor() -> None:
+    """Ping the replicas from a background thread, off the request path."""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is not None or not replicas:
+            return
+        _monitor = threading.Thread(
+            target=_monitor_replicas, name="replica-health", daemon=True
+        )
+        _monitor.start()
+
+
+def get_read_session(primary: Optional[Session] = None) -> Session:
+    """
+    Open a session on the next healthy replica (round robin), falling back to
+    the primary when no replica is configured or none is healthy. The
+    fallback reuses `primary` when given instead of opening a new session.
+    """
+    start_replica_monitor()
+    healthy = [replica for replica in replicas if replica.healthy]
+    if not healthy:
+        return primary if primary is not None else SessionLocal()
+    replica = healthy[next(_replica_cycle) % len(healthy)]
+    db = replica.session_factory()
+    db.replica = replica
+    return db
+
+
 # DB dependencies
 def get_db():
+    """Session on the primary, for writes and read-your-own-write paths."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(db: Session = Depends(get_db)):
+    """
+    Session on a read replica, for read-only queries that tolerate lag.
+    Without a healthy replica it is the request's primary session, so the
+    request still holds a single primary connection.
+    """
+    read_db = get_read_session(primary=db)
+    if read_db is db:
+        yield db
+        return
+    try:
+        yield read_db
+    finally:
+        read_db.close()
@@ -0,0 +1,155 @@
+import ipaddress
+import logging
+import signal
+from typing import Any, List, Optional, Union
+
+from app.core.config import Settings, settings, split_list
+
+logger = logging.getLogger(__name__)
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+_NO_VALUE = object()
+
+
+class PrefixTree:
+    """
+    Binary trie keyed on address bits. A lookup walks at most one node per
+    bit of the address and returns the value of the longest matching prefix.
+    """
+
+    def __init__(self, max_prefix_length: int):
+        self.max_prefix_length = max_prefix_length
+        # Nodes are [child for bit 0, child for bit 1, value]
+        self._root: List[Any] = [None, None, _NO_VALUE]
+
+    def insert(self, network: IPNetwork, value: Any) -> None:
+        bits = int(network.network_address)
+        node = self._root
+        for depth in range(network.prefixlen):
+            bit = (bits >> (self.max_prefix_length - 1 - depth)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, _NO_VALUE]
+            node = node[bit]
+        node[2] = value
+
+    def lookup(self, address: IPAddress, default: Any = None) -> Any:
+        bits = int(address)
+        node = self._root
+        match = node[2]
+        for shift in range(self.max_prefix_length - 1, -1, -1):
+            node = node[(bits >> shift) & 1]
+            if node is None:
+                break
+            if node[2] is not _NO_VALUE:
+                match = node[2]
+        return default if match is _NO_VALUE else match
+
+
+def _parse_address(value: str) -> Optional[IPAddress]:
+    try:
+        address = ipaddress.ip_address(value.strip())
+    except ValueError:
+        return None
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+class IPFilter:
+    """
+    CIDR allow/deny lists and trusted proxy ranges, compiled into one prefix
+    tree per IP version.
+    """
+
+    def __init__(
+        self,
+        allowlist: List[str],
+        denylist: List[str],
+        trusted_proxies: List[str],
+    ):
+        self.has_allowlist = bool(allowlist)
+        self._rules = {4: PrefixTree(32), 6: PrefixTree(128)}
+        self._proxies = {4: PrefixTree(32), 6: PrefixTree(128)}
+        # Denies are inserted last so that they win on identical prefixes
+        for cidrs, allowed in ((allowlist, True), (denylist, False)):
+            for cidr in cidrs:
+                network = ipaddress.ip_network(cidr, strict=False)
+                self._rules[network.version].insert(network, allowed)
+        for cidr in trusted_proxies:
+            network = ipaddress.ip_network(cidr, strict=False)
+            self._proxies[network.version].insert(network, True)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "IPFilter":
+        return cls(
+            split_list(settings.IP_ALLOWLIST),
+            split_list(settings.IP_DENYLIST),
+            split_list(settings.TRUSTED_PROXIES),
+        )
+
+    def is_allowed(self, host: Optional[str]) -> bool:
+        address = _parse_address(host) if host else None
+        if address is None:
+            # Unknown or not an address (e.g. the test client), lists can't
+            # match so it's only let through when nothing is allowlisted
+            return not self.has_allowlist
+        return self._rules[address.version].lookup(
+            address, default=not self.has_allowlist
+        )
+
+    def is_trusted_proxy(self, host: str) -> bool:
+        address = _parse_address(host)
+        if address is None:
+            return False
+        return self._proxies[address.version].lookup(address, default=False)
+
+    def client_host(
+        self, peer: Optional[str], forwarded_for: Optional[str]
+    ) -> Optional[str]:
+        """
+        Walk X-Forwarded-For from the right while hops are trusted proxies,
+        the first untrusted hop is the client. Untrusted peers can't forward.
+        A missing peer is a unix socket, which only a local proxy can reach,
+        so it's trusted; without the header its client stays unknown (None).
+        """
+        if peer is not None and (not forwarded_for or not self.is_trusted_proxy(peer)):
+            return peer
+        hops = [hop.strip() for hop in (forwarded_for or "").split(",") if hop.strip()]
+        host = peer
+        for hop in reversed(hops):
+            host = hop
+            if not self.is_trusted_proxy(hop):
+                break
+        return host
+
+
+_ip_filter = IPFilter.from_settings(settings)
+
+
+def get_ip_filter() -> IPFilter:
+    return _ip_filter
+
+
+def reload_ip_filter() -> IPFilter:
+    """
+    Recompile the lists from the environment and env file. The new filter is
+    swapped in only once it compiled, an invalid CIDR keeps the old one.
+    """
+    global _ip_filter
+    _ip_filter = IPFilter.from_settings(Settings())
+    return _ip_filter
+
+
+def _reload_on_signal(signum, frame) -> None:
+    try:
+        reload_ip_filter()
+    except ValueError:
+        logger.exception("Invalid IP filter settings, keeping the previous lists")
+
+
+def install_reload_signal() -> None:
+    """Reload the lists on SIGHUP, where the platform has it."""
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, _reload_on_signal)
@@ -0,0 +1,86 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statement lists of every active recorder, innermost last
+_recorders: ContextVar[Tuple[List[str], ...]] = ContextVar(
+    "query_recorders", default=()
+)
+
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    for statements in _recorders.get():
+        statements.append(statement)
+
+
+@contextmanager
+def record_queries() -> Iterator[List[str]]:
+    """
+    Collect the SQL statements executed on any engine inside the block,
+    including those run from the threadpool on behalf of the current context.
+    """
+    statements: List[str] = []
+    token = _recorders.set(_recorders.get() + (statements,))
+    try:
+        yield statements
+    finally:
+        _recorders.reset(token)
+
+
+@contextmanager
+def ignore_queries() -> Iterator[None]:
+    """Hide the statements executed inside the block from active recorders."""
+    token = _recorders.set(())
+    try:
+        yield
+    finally:
+        _recorders.reset(token)
+
+
+def query_budget(max_queries: int) -> Callable[[Callable], Callable]:
+    """
+    Declare the maximum number of SQL statements an endpoint may execute.
+    Apply it below the router decorator.
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        setattr(endpoint, BUDGET_ATTRIBUTE, max_queries)
+        return endpoint
+
+    return decorator
+
+
+def get_query_budget(endpoint: Optional[Callable]) -> Optional[int]:
+    return getattr(endpoint, BUDGET_ATTRIBUTE, None)
+
+
+def check_query_budget(name: str, statements: List[str], max_queries: int) -> None:
+    """
+    Warn, or raise when QUERY_BUDGET_STRICT is set (tests), if more than
+    `max_queries` statements were executed.
+    """
+    if len(statements) <= max_queries:
+        return
+
+    message = (
+        f"{name} executed {len(statements)} SQL statements, "
+        f"budget is {max_queries}:\n" + "\n".join(statements)
+    )
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -1,5 +1,9 @@
+import hashlib
+import hmac
+import re
+import secrets
 from datetime import timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from jwt import PyJWTError, decode, encode
 from passlib.context import CryptContext
@@ -12,6 +16,12 @@ from app.schemas.user import UserInDB
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# API keys look like sk_<public prefix>_<secret>
+API_KEY_PREFIX = "sk"
+API_KEY_PREFIX_BYTES = 6
+API_KEY_SCOPES = ["users:read", "users:write", "admin", "api-keys"]
+_API_KEY_PREFIX_PATTERN = re.compile(f"[0-9a-f]{{{API_KEY_PREFIX_BYTES * 2}}}")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -62,3 +72,34 @@ def decode_jwt_token(token: str) -> Optional[Dict[str, Any]]:
         return decoded_token
     except PyJWTError:
         return None
+
+
+def generate_api_key() -> Tuple[str, str, str]:
+    """Return the full key (shown once), its public prefix and its secret."""
+    prefix = secrets.token_hex(API_KEY_PREFIX_BYTES)
+    secret = secrets.token_urlsafe(32)
+    return f"{API_KEY_PREFIX}_{prefix}_{secret}", prefix, secret
+
+
+def parse_api_key(key: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a key into its public prefix and secret. Malformed prefixes are
+    rejected here so that they never reach (or fill) the lookup cache.
+    """
+    parts = key.split("_", 2)
+    if len(parts) != 3 or parts[0] != API_KEY_PREFIX or not parts[2]:
+        return None
+    if not _API_KEY_PREFIX_PATTERN.fullmatch(parts[1]):
+        return None
+    return parts[1], parts[2]
+
+
+def hash_api_key_secret(secret: str) -> str:
+    # Keys are random and long, a keyed fast hash is enough (no bcrypt)
+    return hmac.new(
+        settings.API_KEY_HMAC_SECRET.encode(), secret.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def verify_api_key_secret(secret: str, key_hash: str) -> bool:
+    return hmac.compare_digest(hash_api_key_secret(secret), key_hash)
@@ -1,5 +1,24 @@
+import ipaddress
 from datetime import datetime, timezone
+from typing import Optional
 
 
 def get_current_datetime() -> datetime:
     return datetime.now(timezone.utc)
+
+
+def normalize_ip_address(value: Optional[str]) -> Optional[str]:
+    """
+    Canonical text of an IP address: compressed lowercase IPv6 without zone,
+    IPv4-mapped IPv6 as IPv4. Anything else (e.g. the test client's host
+    name) is returned unchanged.
+    """
+    if value is None:
+        return None
+    try:
+        address = ipaddress.ip_address(value.split("%", 1)[0])
+    except ValueError:
+        return value
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return str(address)
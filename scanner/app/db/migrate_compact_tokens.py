@@ -0,0 +1,139 @@
+"""
+Move the token table to the compact schema and report bytes per row.
+
+    COMPACT_TOKEN_SCHEMA=true python -m app.db.migrate_compact_tokens
+
+The legacy table is kept as `<TOKEN_TABLE>_legacy` unless --drop-legacy is
+given. Byte counts come from SQLite's dbstat table and cover the table and
+its indexes (plus the user agent table after the migration), they are None
+when SQLite was built without it.
+
+SQLite only: rows are copied with their ids, which would leave a server
+database's id sequence behind the copied rows.
+"""
+
+import argparse
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import MetaData, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.db.models.token import Token
+from app.db.models.user import User  # noqa: F401, referenced by tokens.user_id
+from app.db.models.user_agent import UserAgent
+
+
+def table_bytes(connection: Connection, table_names: List[str]) -> Optional[int]:
+    """On-disk bytes of the given tables and their indexes, if dbstat exists."""
+    placeholders = ", ".join(f":name_{i}" for i in range(len(table_names)))
+    params = {f"name_{i}": name for i, name in enumerate(table_names)}
+    try:
+        return connection.execute(
+            text(
+                "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN "
+                f"(SELECT name FROM sqlite_master WHERE tbl_name IN ({placeholders}))"
+            ),
+            params,
+        ).scalar()
+    except OperationalError:
+        # Compiled without SQLITE_ENABLE_DBSTAT_VTAB, the migration goes on
+        return None
+
+
+def _per_row(total: Optional[int], rows: int) -> Optional[float]:
+    if total is None or rows == 0:
+        return None
+    return round(total / rows, 1)
+
+
+def migrate(
+    engine: Engine = engine, batch_size: int = 10_000, drop_legacy: bool = False
+) -> Dict[str, Any]:
+    if not settings.COMPACT_TOKEN_SCHEMA:
+        raise RuntimeError("Set COMPACT_TOKEN_SCHEMA=true before migrating")
+    if engine.dialect.name != "sqlite":
+        raise RuntimeError("The compact token migration only supports SQLite")
+
+    token_table = settings.TOKEN_TABLE
+    legacy_table = f"{token_table}_legacy"
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns(token_table)}
+    if "user_agent_id" in columns:
+        raise RuntimeError(f"{token_table} already uses the compact schema")
+    indexes = [index["name"] for index in inspector.get_indexes(token_table)]
+
+    with engine.begin() as connection:
+        # pysqlite only opens transactions for DML, keep the DDL atomic too
+        connection.exec_driver_sql("BEGIN")
+        rows = connection.execute(
+            text(f'SELECT COUNT(*) FROM "{token_table}"')
+        ).scalar()
+        bytes_before = table_bytes(connection, [token_table])
+
+        # Index names are global in SQLite, free them for the new table
+        connection.execute(
+            text(f'ALTER TABLE "{token_table}" RENAME TO "{legacy_table}"')
+        )
+        for index in indexes:
+            connection.execute(text(f'DROP INDEX "{index}"'))
+        Base.metadata.create_all(
+            connection, tables=[UserAgent.__table__, Token.__table__]
+        )
+
+        legacy = Table(legacy_table, MetaData(), autoload_with=connection)
+        user_agent_ids: Dict[str, int] = {}
+        result = connection.execution_options(yield_per=batch_size).execute(
+            select(legacy).order_by(legacy.c.id)
+        )
+        for batch in result.mappings().partitions():
+            for row in batch:
+                value = row["user_agent"]
+                if value and value not in user_agent_ids:
+                    user_agent_ids[value] = connection.execute(
+                        UserAgent.__table__.insert().values(value=value)
+                    ).inserted_primary_key[0]
+            connection.execute(
+                Token.__table__.insert(),
+                [
+                    {
+                        "id": row["id"],
+                        "token": row["token"],
+                        "expires_at": row["expires_at"],
+                        "created_at": row["created_at"],
+                        "last_used_at": row["last_used_at"],
+                        "user_id": row["user_id"],
+                        "ip_address": row["ip_address"],
+                        "user_agent_id": user_agent_ids.get(row["user_agent"]),
+                    }
+                    for row in batch
+                ],
+            )
+
+        bytes_after = table_bytes(connection, [token_table, UserAgent.__tablename__])
+        if drop_legacy:
+            connection.execute(text(f'DROP TABLE "{legacy_table}"'))
+
+    return {
+        "rows": rows,
+        "user_agents": len(user_agent_ids),
+        "bytes_per_row_before": _per_row(bytes_before, rows),
+        "bytes_per_row_after": _per_row(bytes_after, rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--drop-legacy", action="store_true")
+    args = parser.parse_args()
+
+    report = migrate(batch_size=args.batch_size, drop_legacy=args.drop_legacy)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
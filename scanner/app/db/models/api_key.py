@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+
+from app.core.config import settings
+from app.core.utils import get_current_datetime
+from app.db import Base
+
+
+class ApiKey(Base):
+    __tablename__ = settings.API_KEY_TABLE
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    prefix = Column(String, unique=True, index=True, nullable=False)
+    key_hash = Column(String, nullable=False)
+    # Space separated
+    scopes = Column(String, nullable=False, default="")
+    expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=get_current_datetime)
+    last_used_at = Column(DateTime, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+
+    user = relationship("User", back_populates="api_keys")
@@ -1,9 +1,33 @@
+from typing import Optional
+
 from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.core.config import settings
 from app.core.utils import get_current_datetime
 from app.db import Base
+from app.db.models.user_agent import UserAgent
+from app.db.types import EpochSeconds, PackedIPAddress
+
+# The compact schema keeps the same attributes and Python types, only the
+# stored representation changes (see app.db.migrate_compact_tokens)
+if settings.COMPACT_TOKEN_SCHEMA:
+    TimestampType = EpochSeconds
+    IPAddressType = PackedIPAddress
+else:
+    TimestampType = DateTime
+    IPAddressType = String
+
+
+def _get_user_agent(token: "Token") -> Optional[str]:
+    return token.user_agent_ref.value if token.user_agent_ref else None
+
+
+def _set_user_agent(token: "Token", value: Optional[str]) -> None:
+    if token.user_agent_ref is not None and token.user_agent_ref.value == value:
+        return
+    # Resolved to an existing row on flush, shared rows are never modified
+    token.user_agent_ref = UserAgent(value=value) if value else None
 
 
 class Token(Base):
@@ -11,12 +35,19 @@ class Token(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     token = Column(String, unique=True, index=True)
-    expires_at = Column(DateTime, nullable=False)
-    created_at = Column(DateTime, default=get_current_datetime)
-    last_used_at = Column(DateTime, default=get_current_datetime)
+    expires_at = Column(TimestampType, nullable=False)
+    created_at = Column(TimestampType, default=get_current_datetime)
+    last_used_at = Column(TimestampType, default=get_current_datetime)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
-    ip_address = Column(String, nullable=True)
-    user_agent = Column(String, nullable=True)
+    ip_address = Column(IPAddressType, nullable=True)
+    if settings.COMPACT_TOKEN_SCHEMA:
+        user_agent_id = Column(
+            Integer, ForeignKey(f"{settings.USER_AGENT_TABLE}.id"), nullable=True
+        )
+        user_agent_ref = relationship(UserAgent)
+        user_agent = property(_get_user_agent, _set_user_agent)
+    else:
+        user_agent = Column(String, nullable=True)
 
     user = relationship("User", back_populates="tokens")
 
@@ -16,3 +16,6 @@ class User(Base):
     is_superuser = Column(Boolean, default=False)
 
     tokens = relationship("Token", back_populates="user", cascade="all, delete-orphan")
+    api_keys = relationship(
+        "ApiKey", back_populates="user", cascade="all, delete-orphan"
+    )
@@ -0,0 +1,106 @@
+from typing import Dict
+
+from sqlalchemy import Column, Integer, String, event, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.db import Base
+
+# Ids of agents committed by or seen in this process, reset when it grows too
+# large. Ids interned in an open transaction wait in session.info until it
+# commits, a rollback may take the row with it.
+_USER_AGENT_CACHE_SIZE = 10_000
+_user_agent_ids: Dict[str, int] = {}
+_PENDING_IDS_KEY = "user_agent_ids"
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class UserAgent(Base):
+    """Interned User-Agent strings, referenced by id from the compact tokens."""
+
+    __tablename__ = settings.USER_AGENT_TABLE
+
+    id = Column(Integer, primary_key=True)
+    value = Column(String, unique=True, index=True, nullable=False)
+
+
+def _insert_user_agent(session: Session, value: str) -> None:
+    """Insert the agent unless it exists, concurrent inserts can't conflict."""
+    upsert = _UPSERT_DIALECTS.get(session.get_bind().dialect.name)
+    if upsert is not None:
+        session.execute(upsert(UserAgent).values(value=value).on_conflict_do_nothing())
+        return
+    try:
+        with session.begin_nested():
+            session.execute(insert(UserAgent).values(value=value))
+    except IntegrityError:
+        pass
+
+
+def _pending_ids(session: Session) -> Dict[str, int]:
+    return session.info.setdefault(_PENDING_IDS_KEY, {})
+
+
+def _intern_user_agent(session: Session, value: str) -> UserAgent:
+    user_agent_id = _user_agent_ids.get(value) or _pending_ids(session).get(value)
+    if user_agent_id is not None:
+        # Attach a known row without loading it
+        cached = UserAgent(id=user_agent_id, value=value)
+        make_transient_to_detached(cached)
+        return session.merge(cached, load=False)
+
+    # Insert first and select after, so two requests interning the same new
+    # agent both end up with the one row instead of a unique violation
+    _insert_user_agent(session, value)
+    user_agent = session.query(UserAgent).filter(UserAgent.value == value).one()
+    _pending_ids(session)[value] = user_agent.id
+    return user_agent
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_user_agent_ids(session):
+    pending = session.info.pop(_PENDING_IDS_KEY, None)
+    if not pending:
+        return
+    if len(_user_agent_ids) + len(pending) > _USER_AGENT_CACHE_SIZE:
+        _user_agent_ids.clear()
+    _user_agent_ids.update(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_user_agent_ids(session, previous_transaction):
+    # Savepoint rollbacks included: the rows may be gone, look them up again
+    session.info.pop(_PENDING_IDS_KEY, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _end_user_agent_ids(session, transaction):
+    # Closing a session rolls back without the rollback events
+    if transaction.parent is None:
+        session.info.pop(_PENDING_IDS_KEY, None)
+
+
+@event.listens_for(Session, "before_flush")
+def _intern_user_agents(session, flush_context, instances):
+    """
+    Token.user_agent creates a transient UserAgent on assignment. Swap each one
+    for the stored row with the same value.
+    """
+    pending = [obj for obj in session.new if isinstance(obj, UserAgent)]
+    if not pending:
+        return
+
+    replacements: Dict[int, UserAgent] = {}
+    with session.no_autoflush:
+        for user_agent in pending:
+            replacements[id(user_agent)] = _intern_user_agent(session, user_agent.value)
+            session.expunge(user_agent)
+
+        for obj in list(session.new) + list(session.dirty):
+            current = getattr(obj, "user_agent_ref", None)
+            if current is not None and id(current) in replacements:
+                obj.user_agent_ref = replacements[id(current)]
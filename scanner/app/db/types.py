@@ -0,0 +1,58 @@
+import ipaddress
+from datetime import datetime, timezone
+
+from sqlalchemy import Integer, LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from app.core.utils import normalize_ip_address
+
+
+class EpochSeconds(TypeDecorator):
+    """Stores a datetime as integer seconds since the epoch (UTC)."""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+class PackedIPAddress(TypeDecorator):
+    """
+    Stores an IP address as 4 (IPv4) or 16 (IPv6) bytes. Values that are not
+    addresses (e.g. test client host names) are stored as UTF-8, padded with
+    a NUL byte when their length would be mistaken for an address.
+
+    Addresses read back in their normalize_ip_address form, compare them in
+    that form too.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return ipaddress.ip_address(normalize_ip_address(value)).packed
+        except ValueError:
+            raw = value.encode("utf-8")
+            if len(raw) in (4, 16):
+                raw += b"\x00"
+            return raw
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if len(value) in (4, 16):
+            return str(ipaddress.ip_address(bytes(value)))
+        return bytes(value).rstrip(b"\x00").decode("utf-8")
@@ -1,11 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.routes import router as api_router
+from app.core.admission import admission_controller
 from app.core.config import settings
-from app.core.database import Base, engine
+from app.core.database import Base, engine, get_replica_health
+from app.core.ip_filter import install_reload_signal
 from app.core.utils import get_current_datetime
+from app.middleware.admission_middleware import AdmissionControlMiddleware
 from app.middleware.auth_middleware import AutoRefreshMiddleware
+from app.middleware.ip_filter_middleware import IPFilterMiddleware
+from app.middleware.query_budget_middleware import QueryBudgetMiddleware
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -23,9 +29,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Check endpoint query budgets
+app.add_middleware(QueryBudgetMiddleware)
+
 # Add auto-refresh middleware
 app.add_middleware(AutoRefreshMiddleware)
 
+# Shed load before anything else runs
+app.add_middleware(AdmissionControlMiddleware)
+
+# Reject filtered networks first, before any DB or bcrypt work
+app.add_middleware(IPFilterMiddleware)
+install_reload_signal()
+
 # Include API routes
 app.include_router(api_router)
 
@@ -36,8 +52,18 @@ def read_root():
 
 
 @app.get("/health")
-def health_check():
-    return {"status": "ok"}
+async def health_check():
+    # Async so that it answers without waiting for a saturated threadpool
+    admission = admission_controller.snapshot()
+    if admission["health_saturated"]:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "saturated", "admission": admission},
+        )
+
+    replicas = get_replica_health()
+    status = "ok" if all(replicas.values()) else "degraded"
+    return {"status": status, "replicas": replicas, "admission": admission}
 
 
 @app.get("/ping")
@@ -0,0 +1,31 @@
+import time
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.admission import admission_controller
+from app.core.config import settings
+
+
+class AdmissionControlMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        route_class = admission_controller.classify(request.url.path)
+        if route_class is None:
+            return await call_next(request)
+
+        # Shed before any DB or bcrypt work is queued
+        if not admission_controller.try_admit(route_class):
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Server is overloaded, retry later"},
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+
+        # Read by the record_queue_delay dependency once a worker thread is free
+        request.state.route_class = route_class
+        request.state.admitted_at = time.monotonic()
+        try:
+            return await call_next(request)
+        finally:
+            admission_controller.release(route_class)
@@ -7,7 +7,7 @@ from app.api.routes.v1 import AUTH_ROUTER_PREFIX
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.core.security import create_jwt_token, create_token_object, decode_jwt_token
-from app.core.utils import get_current_datetime
+from app.core.utils import get_current_datetime, normalize_ip_address
 from app.db.models.token import Token
 
 
@@ -33,7 +33,7 @@ class AutoRefreshMiddleware(BaseHTTPMiddleware):
         token = auth_header.replace("Bearer ", "")
 
         # Get client info
-        ip_address = request.client.host
+        ip_address = normalize_ip_address(request.client.host)
         user_agent = request.headers.get("User-Agent", "")
 
         # Process the request first
@@ -0,0 +1,23 @@
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.ip_filter import get_ip_filter
+
+
+class IPFilterMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        ip_filter = get_ip_filter()
+        # No client means a unix socket, resolved through X-Forwarded-For
+        peer, port = request.client or (None, 0)
+        host = ip_filter.client_host(peer, request.headers.get("X-Forwarded-For"))
+        if not ip_filter.is_allowed(host):
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"detail": "Access denied from this address"},
+            )
+
+        # Token binding and refresh read request.client downstream
+        if host is not None:
+            request.scope["client"] = (host, port)
+        return await call_next(request)
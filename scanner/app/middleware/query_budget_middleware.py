@@ -0,0 +1,18 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.query_budget import check_query_budget, get_query_budget, record_queries
+
+
+class QueryBudgetMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        with record_queries() as statements:
+            response = await call_next(request)
+
+        # The router stores the matched endpoint in the shared scope
+        max_queries = get_query_budget(request.scope.get("endpoint"))
+        if max_queries is not None:
+            name = f"{request.method} {request.url.path}"
+            check_query_budget(name, statements, max_queries)
+
+        return response
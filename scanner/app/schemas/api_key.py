@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+from app.core.security import API_KEY_SCOPES
+
+
+class ApiKeyCreate(BaseModel):
+    name: str
+    scopes: List[str] = []
+    expires_in_days: Optional[int] = Field(None, ge=1)
+
+    @field_validator("scopes")
+    def validate_scopes(cls, value):
+        unknown = set(value) - set(API_KEY_SCOPES)
+        if unknown:
+            raise ValueError(f"Unknown scopes: {', '.join(sorted(unknown))}")
+        return value
+
+
+class ApiKey(BaseModel):
+    id: int
+    name: str
+    prefix: str
+    scopes: List[str]
+    expires_at: Optional[datetime] = None
+    created_at: datetime
+    last_used_at: Optional[datetime] = None
+
+    @field_validator("scopes", mode="before")
+    def split_scopes(cls, value):
+        return value.split() if isinstance(value, str) else value
+
+    class Config:
+        from_attributes = True
+
+
+# Returned once at creation, the full key is never stored
+class ApiKeyCreated(ApiKey):
+    key: str
@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+# The app reads its settings at import time, configure it before importing
+_DATA_DIR = tempfile.mkdtemp(prefix="scanner-tests-")
+os.environ.setdefault("TOKEN_TABLE", "tokens")
+os.environ.setdefault("USER_TABLE", "users")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DATA_DIR}/primary.db")
+os.environ.setdefault("HASHING_ALGORITHM", "HS256")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-that-is-long-enough-for-hs256")
+os.environ.setdefault("API_KEY_HMAC_SECRET", "test-api-key-hmac-secret")
+os.environ.setdefault("MASTER_PASSWORD_HASH", "not-a-hash")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture
+def data_dir() -> str:
+    return _DATA_DIR
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def user_credentials(client: TestClient) -> dict:
+    name = f"user-{uuid.uuid4().hex[:12]}"
+    credentials = {"username": name, "password": "password"}
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": f"{name}@example.com", **credentials},
+    )
+    assert response.status_code == 200
+    return credentials
+
+
+@pytest.fixture
+def auth_headers(client: TestClient, user_credentials: dict) -> dict:
+    response = client.post("/api/v1/auth/login", data=user_credentials)
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,101 @@
+import pytest
+
+from app.core import admission
+from app.core.admission import (
+    LIGHT,
+    AdmissionController,
+    RouteClassStats,
+    admission_controller,
+)
+from app.core.config import settings
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(admission, "time", clock)
+    return clock
+
+
+def _threadpool(waiting: int):
+    return staticmethod(lambda: {"busy": 40, "size": 40, "waiting": waiting})
+
+
+def test_queue_delay_decays_without_samples(clock):
+    stats = RouteClassStats(max_in_flight=10)
+    for _ in range(10):
+        stats.record_queue_delay(5.0)
+    stats.in_flight = 1
+    assert stats.is_saturated()
+
+    clock.now += 10
+    assert stats.queue_delay() < settings.ADMISSION_MAX_QUEUE_DELAY_SECONDS
+    assert not stats.is_saturated()
+
+
+def test_health_signal_has_hysteresis(clock, monkeypatch):
+    controller = AdmissionController()
+    saturated = True
+    monkeypatch.setattr(controller, "is_saturated", lambda: saturated)
+    hold = settings.ADMISSION_HEALTH_HOLD_SECONDS
+
+    assert controller.health_saturated() is False
+    clock.now += hold / 2
+    assert controller.health_saturated() is False
+    clock.now += hold / 2
+    assert controller.health_saturated() is True
+
+    # A momentary recovery does not flip it back
+    saturated = False
+    assert controller.health_saturated() is True
+    saturated = True
+    clock.now += hold
+    assert controller.health_saturated() is True
+
+    saturated = False
+    controller.health_saturated()
+    clock.now += hold
+    assert controller.health_saturated() is False
+
+
+def test_light_requests_are_shed_with_retry_after(client, monkeypatch):
+    stats = admission_controller.classes[LIGHT]
+    monkeypatch.setattr(stats, "in_flight", stats.max_in_flight)
+
+    response = client.get("/ping")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(
+        settings.ADMISSION_RETRY_AFTER_SECONDS
+    )
+
+
+def test_logins_are_shed_while_threadpool_is_full(client, monkeypatch):
+    monkeypatch.setattr(AdmissionController, "threadpool_statistics", _threadpool(1))
+
+    response = client.post(
+        "/api/v1/auth/login", data={"username": "x", "password": "x"}
+    )
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    # Light requests still get through
+    assert client.get("/ping").status_code == 200
+
+
+def test_health_returns_503_when_saturated(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_HEALTH_HOLD_SECONDS", 0)
+    monkeypatch.setattr(admission_controller, "_health_saturated", False)
+    monkeypatch.setattr(admission_controller, "_health_changing_since", None)
+    assert client.get("/health").status_code == 200
+
+    monkeypatch.setattr(AdmissionController, "threadpool_statistics", _threadpool(1))
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == "saturated"
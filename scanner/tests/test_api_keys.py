@@ -0,0 +1,120 @@
+import pytest
+
+from app.core import api_keys
+from app.core.api_keys import ApiKeyCache
+from app.core.config import settings
+from app.core.security import generate_api_key, hash_api_key_secret, parse_api_key
+
+API_KEYS_URL = "/api/v1/api-keys/"
+
+
+def _create_key(client, headers, **key_in) -> dict:
+    response = client.post(
+        API_KEYS_URL, json={"name": "key", **key_in}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_key_cannot_create_key_with_more_scopes(client, auth_headers):
+    key = _create_key(client, auth_headers, scopes=["api-keys", "users:read"])
+    key_headers = {"X-API-Key": key["key"]}
+
+    response = client.post(
+        API_KEYS_URL,
+        json={"name": "wider", "scopes": ["api-keys", "users:write"]},
+        headers=key_headers,
+    )
+    assert response.status_code == 403
+
+    narrower = _create_key(client, key_headers, scopes=["users:read"])
+    assert narrower["scopes"] == ["users:read"]
+
+
+def test_session_can_create_key_with_any_scope(client, auth_headers):
+    key = _create_key(client, auth_headers, scopes=["users:read", "users:write"])
+
+    assert key["scopes"] == ["users:read", "users:write"]
+
+
+@pytest.mark.parametrize("expires_in_days", [0, -1])
+def test_expiry_must_be_positive(client, auth_headers, expires_in_days):
+    response = client.post(
+        API_KEYS_URL,
+        json={"name": "key", "expires_in_days": expires_in_days},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 422
+
+
+def test_created_key_is_listed(client, auth_headers):
+    key = _create_key(client, auth_headers, scopes=["api-keys"])
+
+    response = client.get(API_KEYS_URL, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert [listed["prefix"] for listed in response.json()] == [key["prefix"]]
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        "sk_ABCDEF012345_secret",
+        "sk_0123456789a_secret",
+        "sk_0123456789abc_secret",
+        "sk_0123456789ag_secret",
+        "sk_0123456789ab_",
+        "pk_0123456789ab_secret",
+    ],
+)
+def test_malformed_keys_are_rejected_before_the_cache(client, monkeypatch, key):
+    cache = ApiKeyCache()
+    monkeypatch.setattr("app.api.dependencies.api_key_cache", cache)
+
+    response = client.get("/api/v1/users/me", headers={"X-API-Key": key})
+
+    assert parse_api_key(key) is None
+    assert response.status_code == 401
+    assert len(cache._entries) == 0
+
+
+def test_generated_keys_parse():
+    key, prefix, secret = generate_api_key()
+
+    assert parse_api_key(key) == (prefix, secret)
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(api_keys, "_CACHE_SIZE", 2)
+    cache = ApiKeyCache()
+    cache.set("a" * 12, None)
+    cache.set("b" * 12, None)
+
+    assert cache.get("a" * 12) == (True, None)
+    cache.set("c" * 12, None)
+
+    assert cache.get("a" * 12) == (True, None)
+    assert cache.get("b" * 12) == (False, None)
+    assert cache.get("c" * 12) == (True, None)
+
+
+def test_api_keys_survive_jwt_secret_rotation(client, auth_headers, monkeypatch):
+    key = _create_key(client, auth_headers, scopes=["users:read"])
+    key_headers = {"X-API-Key": key["key"]}
+
+    monkeypatch.setattr(settings, "SECRET_KEY", "rotated-jwt-signing-secret")
+    assert client.get("/api/v1/users/me", headers=key_headers).status_code == 200
+
+    monkeypatch.setattr(settings, "API_KEY_HMAC_SECRET", "rotated-hmac-secret")
+    assert client.get("/api/v1/users/me", headers=key_headers).status_code == 401
+
+
+def test_secret_hash_is_keyed_by_hmac_secret(monkeypatch):
+    digest = hash_api_key_secret("secret")
+
+    monkeypatch.setattr(settings, "SECRET_KEY", "another-secret")
+    assert hash_api_key_secret("secret") == digest
+
+    monkeypatch.setattr(settings, "API_KEY_HMAC_SECRET", "another-secret")
+    assert hash_api_key_secret("secret") != digest
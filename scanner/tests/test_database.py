@@ -0,0 +1,114 @@
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from app.core import database
+from app.core.database import (
+    Base,
+    Replica,
+    SessionLocal,
+    get_db,
+    get_read_db,
+    get_read_session,
+)
+from app.db.models.user import User
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch) -> Replica:
+    replica = Replica("replica-0", f"sqlite:///{tmp_path}/replica.db")
+    Base.metadata.create_all(bind=replica.engine)
+    monkeypatch.setattr(database, "replicas", [replica])
+    monkeypatch.setattr(database, "start_replica_monitor", lambda: None)
+    return replica
+
+
+def _add_user(db, username: str) -> None:
+    db.add(
+        User(username=username, email=f"{username}@example.com", hashed_password="x")
+    )
+    db.commit()
+
+
+def test_reads_are_routed_to_the_replica(replica):
+    username = f"replica-only-{uuid.uuid4().hex[:8]}"
+    with replica.session_factory() as db:
+        _add_user(db, username)
+
+    with get_read_session() as db:
+        assert db.query(User).filter(User.username == username).first() is not None
+    with SessionLocal() as db:
+        assert db.query(User).filter(User.username == username).first() is None
+
+
+def test_unhealthy_replica_is_skipped(replica):
+    replica.mark_down()
+    with get_read_session() as db:
+        assert db.get_bind() is database.engine
+
+
+def test_failing_replica_falls_back_to_primary(tmp_path, monkeypatch):
+    broken = Replica("replica-0", f"sqlite:///{tmp_path}/missing/replica.db")
+    monkeypatch.setattr(database, "replicas", [broken])
+    monkeypatch.setattr(database, "start_replica_monitor", lambda: None)
+    username = f"primary-{uuid.uuid4().hex[:8]}"
+    with SessionLocal() as db:
+        _add_user(db, username)
+
+    with get_read_session() as db:
+        assert db.query(User).filter(User.username == username).first() is not None
+    assert broken.healthy is False
+    assert database.check_replica_health() == {"replica-0": False}
+
+
+def test_health_check_restores_replica(replica):
+    replica.mark_down()
+    assert database.check_replica_health() == {"replica-0": True}
+
+
+def test_fresh_token_is_read_from_primary(replica, client, auth_headers):
+    # Registration and login only reached the primary, the replica is empty
+    response = client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert replica.healthy is True
+
+
+def test_read_db_shares_the_primary_session_without_replicas(monkeypatch):
+    monkeypatch.setattr(database, "replicas", [])
+    primary = next(get_db())
+
+    assert next(get_read_db(primary)) is primary
+
+
+def test_read_db_opens_a_replica_session(replica):
+    primary = next(get_db())
+    read_db = next(get_read_db(primary))
+
+    assert read_db is not primary
+    assert read_db.get_bind() is replica.engine
+
+
+def test_authenticated_request_holds_one_primary_connection(
+    monkeypatch, client, auth_headers
+):
+    monkeypatch.setattr(database, "replicas", [])
+    checked_out = {"now": 0, "peak": 0}
+
+    def on_checkout(*args):
+        checked_out["now"] += 1
+        checked_out["peak"] = max(checked_out["peak"], checked_out["now"])
+
+    def on_checkin(*args):
+        checked_out["now"] -= 1
+
+    event.listen(database.engine, "checkout", on_checkout)
+    event.listen(database.engine, "checkin", on_checkin)
+    try:
+        response = client.get("/api/v1/users/me", headers=auth_headers)
+    finally:
+        event.remove(database.engine, "checkout", on_checkout)
+        event.remove(database.engine, "checkin", on_checkin)
+
+    assert response.status_code == 200
+    assert checked_out["peak"] == 1
@@ -0,0 +1,146 @@
+import ipaddress
+
+import anyio
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core import ip_filter as ip_filter_module
+from app.core.ip_filter import IPFilter, PrefixTree
+from app.middleware.ip_filter_middleware import IPFilterMiddleware
+
+
+def test_prefix_tree_returns_longest_match():
+    tree = PrefixTree(32)
+    tree.insert(ipaddress.ip_network("10.0.0.0/8"), "wide")
+    tree.insert(ipaddress.ip_network("10.1.0.0/16"), "narrow")
+
+    assert tree.lookup(ipaddress.ip_address("10.1.2.3")) == "narrow"
+    assert tree.lookup(ipaddress.ip_address("10.2.0.1")) == "wide"
+    assert tree.lookup(ipaddress.ip_address("11.0.0.1"), default="none") == "none"
+
+
+def test_prefix_tree_matches_default_route_and_host():
+    tree = PrefixTree(128)
+    tree.insert(ipaddress.ip_network("::/0"), "any")
+    tree.insert(ipaddress.ip_network("2001:db8::1/128"), "host")
+
+    assert tree.lookup(ipaddress.ip_address("2001:db8::1")) == "host"
+    assert tree.lookup(ipaddress.ip_address("2001:db8::2")) == "any"
+
+
+def test_narrower_allow_overrides_wider_deny():
+    ip_filter = IPFilter([], ["10.0.0.0/8"], [])
+
+    assert not ip_filter.is_allowed("10.1.2.3")
+    assert ip_filter.is_allowed("192.168.0.1")
+
+    ip_filter = IPFilter(["10.1.0.0/16"], ["10.0.0.0/8"], [])
+    assert ip_filter.is_allowed("10.1.2.3")
+    assert not ip_filter.is_allowed("10.2.0.1")
+    assert not ip_filter.is_allowed("192.168.0.1")
+
+
+def test_deny_wins_on_identical_prefix():
+    ip_filter = IPFilter(["10.0.0.0/8"], ["10.0.0.0/8"], [])
+
+    assert not ip_filter.is_allowed("10.1.2.3")
+
+
+def test_ipv4_mapped_addresses_match_ipv4_rules():
+    ip_filter = IPFilter([], ["192.0.2.0/24"], [])
+
+    assert not ip_filter.is_allowed("::ffff:192.0.2.7")
+
+
+def test_unknown_host_only_allowed_without_allowlist():
+    assert IPFilter([], ["10.0.0.0/8"], []).is_allowed(None)
+    assert IPFilter([], [], []).is_allowed("testclient")
+    assert not IPFilter(["10.0.0.0/8"], [], []).is_allowed(None)
+    assert not IPFilter(["10.0.0.0/8"], [], []).is_allowed("testclient")
+
+
+@pytest.mark.parametrize(
+    "peer, forwarded_for, expected",
+    [
+        # Untrusted peers can't forward
+        ("203.0.113.9", "198.51.100.1", "203.0.113.9"),
+        ("10.0.0.2", None, "10.0.0.2"),
+        ("10.0.0.2", "198.51.100.1", "198.51.100.1"),
+        # Spoofed entries left of the first untrusted hop are ignored
+        ("10.0.0.2", "1.1.1.1, 198.51.100.1, 10.0.0.3", "198.51.100.1"),
+        # All hops trusted, the leftmost is the best we know
+        ("10.0.0.2", "10.0.0.4, 10.0.0.3", "10.0.0.4"),
+        # Unix socket peers are trusted, without a header the client is unknown
+        (None, "198.51.100.1, 10.0.0.3", "198.51.100.1"),
+        (None, None, None),
+    ],
+)
+def test_client_host_walks_forwarded_for(peer, forwarded_for, expected):
+    ip_filter = IPFilter([], [], ["10.0.0.0/8"])
+
+    assert ip_filter.client_host(peer, forwarded_for) == expected
+
+
+def _echo_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(IPFilterMiddleware)
+
+    @app.get("/client")
+    def read_client(request: Request):
+        return {"host": request.client.host if request.client else None}
+
+    return app
+
+
+async def _request(client, headers):
+    transport = httpx.ASGITransport(app=_echo_app(), client=client)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        return await http.get("/client", headers=headers)
+
+
+def _get(client, headers=None) -> httpx.Response:
+    return anyio.run(_request, client, headers)
+
+
+@pytest.fixture
+def install_filter(monkeypatch):
+    def install(*lists):
+        monkeypatch.setattr(ip_filter_module, "_ip_filter", IPFilter(*lists))
+
+    return install
+
+
+def test_unix_socket_denied_with_allowlist(install_filter):
+    install_filter(["198.51.100.0/24"], [], [])
+
+    assert _get(None).status_code == 403
+    assert _get(None, {"X-Forwarded-For": "203.0.113.9"}).status_code == 403
+
+
+def test_unix_socket_resolved_from_forwarded_for(install_filter):
+    install_filter(["198.51.100.0/24"], [], [])
+
+    response = _get(None, {"X-Forwarded-For": "198.51.100.7"})
+
+    assert response.status_code == 200
+    assert response.json() == {"host": "198.51.100.7"}
+
+
+def test_unix_socket_passes_without_allowlist(install_filter):
+    install_filter([], ["203.0.113.0/24"], [])
+
+    response = _get(None)
+
+    assert response.status_code == 200
+    assert response.json() == {"host": None}
+
+
+def test_trusted_proxy_rewrites_client(install_filter):
+    install_filter([], ["203.0.113.0/24"], ["10.0.0.0/8"])
+
+    response = _get(("10.0.0.2", 1), {"X-Forwarded-For": "198.51.100.7"})
+    assert response.json() == {"host": "198.51.100.7"}
+
+    response = _get(("10.0.0.2", 1), {"X-Forwarded-For": "203.0.113.9"})
+    assert response.status_code == 403
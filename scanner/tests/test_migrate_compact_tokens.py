@@ -0,0 +1,180 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.core.database import Base
+from app.core.security import create_jwt_token
+from app.db.models.token import Token
+from app.db.models.user import User
+
+# The token model picks its schema at import time, so the migration and the
+# compact model run in a child process started with COMPACT_TOKEN_SCHEMA=true
+_MIGRATE_AND_READ = """
+import json
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.database import SessionLocal, engine
+from app.db.migrate_compact_tokens import migrate
+from app.db.models.token import Token
+from app.main import app
+
+if sys.argv[1] == "without-dbstat":
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _hide_dbstat(conn, cursor, statement, parameters, context, executemany):
+        return statement.replace("FROM dbstat", "FROM missing_dbstat"), parameters
+
+report = migrate()
+with SessionLocal() as db:
+    tokens = [
+        {
+            "token": token.token,
+            "expires_at": token.expires_at.isoformat(),
+            "created_at": token.created_at.isoformat(),
+            "ip_address": token.ip_address,
+            "user_agent": token.user_agent,
+            "user_agent_id": token.user_agent_id,
+        }
+        for token in db.query(Token).order_by(Token.id)
+    ]
+
+client = TestClient(app, client=("2001:DB8::1", 50000))
+status = client.get(
+    "/api/v1/users/me", headers={"Authorization": f"Bearer {sys.argv[2]}"}
+).status_code
+print(json.dumps({"report": report, "tokens": tokens, "status": status}))
+"""
+
+_CREATED_AT = datetime(2024, 5, 1, 12, 30, 15, 250000)
+_EXPIRES_AT = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None) + (
+    timedelta(days=1)
+)
+
+
+def _create_legacy_database(path: Path) -> str:
+    """Legacy tokens as the old login stored them, returns a valid JWT."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[User.__table__, Token.__table__])
+    payload = {
+        "exp": _EXPIRES_AT.replace(tzinfo=timezone.utc),
+        "sub": "legacy@example.com",
+        "ip_address": "2001:DB8::1",
+        "username": "legacy",
+        "user_id": 1,
+    }
+    jwt = create_jwt_token(payload)
+    rows = [
+        (jwt, "2001:DB8::1", "Agent/1.0"),
+        ("legacy-ipv4", "::ffff:203.0.113.5", "Agent/1.0"),
+        ("legacy-bare", None, None),
+        ("legacy-other", "203.0.113.6", "Agent/2.0"),
+    ]
+    with engine.begin() as connection:
+        connection.execute(
+            User.__table__.insert().values(
+                id=1,
+                username="legacy",
+                email="legacy@example.com",
+                hashed_password="x",
+                is_active=True,
+                is_superuser=False,
+            )
+        )
+        connection.execute(
+            Token.__table__.insert(),
+            [
+                {
+                    "token": token,
+                    "expires_at": _EXPIRES_AT,
+                    "created_at": _CREATED_AT,
+                    "last_used_at": _CREATED_AT,
+                    "user_id": 1,
+                    "ip_address": ip_address,
+                    "user_agent": user_agent,
+                }
+                for token, ip_address, user_agent in rows
+            ],
+        )
+    engine.dispose()
+    return jwt
+
+
+def _migrate(path: Path, jwt: str, dbstat: str) -> dict:
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}",
+        "COMPACT_TOKEN_SCHEMA": "true",
+        "DATABASE_REPLICA_URLS": "",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _MIGRATE_AND_READ, dbstat, jwt],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("dbstat", ["with-dbstat", "without-dbstat"])
+def test_migration_copies_tokens_to_the_compact_schema(tmp_path, dbstat):
+    path = tmp_path / "legacy.db"
+    jwt = _create_legacy_database(path)
+
+    result = _migrate(path, jwt, dbstat)
+
+    report = result["report"]
+    assert set(report) == {
+        "rows",
+        "user_agents",
+        "bytes_per_row_before",
+        "bytes_per_row_after",
+    }
+    assert report["rows"] == 4
+    assert report["user_agents"] == 2
+    if dbstat == "with-dbstat":
+        assert report["bytes_per_row_before"] > 0
+        assert report["bytes_per_row_after"] > 0
+    else:
+        assert report["bytes_per_row_before"] is None
+        assert report["bytes_per_row_after"] is None
+
+    tokens = result["tokens"]
+    assert [token["token"] for token in tokens] == [
+        jwt,
+        "legacy-ipv4",
+        "legacy-bare",
+        "legacy-other",
+    ]
+    # Stored as whole seconds in UTC
+    assert {token["created_at"] for token in tokens} == {
+        _CREATED_AT.replace(microsecond=0, tzinfo=timezone.utc).isoformat()
+    }
+    assert tokens[0]["expires_at"] == (
+        _EXPIRES_AT.replace(tzinfo=timezone.utc).isoformat()
+    )
+    assert [token["ip_address"] for token in tokens] == [
+        "2001:db8::1",
+        "203.0.113.5",
+        None,
+        "203.0.113.6",
+    ]
+    assert [token["user_agent"] for token in tokens] == [
+        "Agent/1.0",
+        "Agent/1.0",
+        None,
+        "Agent/2.0",
+    ]
+    assert tokens[0]["user_agent_id"] == tokens[1]["user_agent_id"]
+
+    # The JWT was minted before the migration and still authenticates
+    assert result["status"] == 200
@@ -0,0 +1,43 @@
+import uuid
+
+import pytest
+
+from app.api.routes.v1.users import read_user_me
+from app.core.config import settings
+from app.core.query_budget import BUDGET_ATTRIBUTE, QueryBudgetExceeded, record_queries
+
+
+@pytest.fixture(autouse=True)
+def strict_budgets(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", True)
+
+
+def test_duplicate_register_returns_400(client):
+    name = f"dup-{uuid.uuid4().hex[:8]}"
+    user = {"email": f"{name}@example.com", "username": name, "password": "p"}
+    assert client.post("/api/v1/auth/register", json=user).status_code == 200
+
+    with record_queries() as statements:
+        response = client.post("/api/v1/auth/register", json=user)
+    assert response.status_code == 400
+    assert (
+        response.json()["detail"] == "User with this email or username already exists"
+    )
+    # The failed INSERT only, no check-then-insert
+    assert len(statements) == 1
+
+
+def test_users_me_stays_within_budget(client, auth_headers):
+    with record_queries() as statements:
+        response = client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    # One joined Token+User SELECT and the last_used_at UPDATE
+    assert len(statements) == 2
+    assert statements[0].lstrip().startswith("SELECT")
+    assert "JOIN" in statements[0]
+
+
+def test_users_me_fails_over_lowered_budget(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(read_user_me, BUDGET_ATTRIBUTE, 1)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/api/v1/users/me", headers=auth_headers)
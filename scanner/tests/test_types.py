@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.utils import normalize_ip_address
+from app.db.types import EpochSeconds, PackedIPAddress
+
+
+@pytest.mark.parametrize(
+    "written, read",
+    [
+        ("10.0.0.1", "10.0.0.1"),
+        ("::ffff:1.2.3.4", "1.2.3.4"),
+        ("fe80::1%eth0", "fe80::1"),
+        ("2001:DB8::1", "2001:db8::1"),
+        ("testclient", "testclient"),
+        ("abcd", "abcd"),
+        ("sixteen-char-hst", "sixteen-char-hst"),
+    ],
+)
+def test_packed_ip_address_round_trip(written, read):
+    column = PackedIPAddress()
+    stored = column.process_bind_param(written, None)
+    assert column.process_result_value(stored, None) == read
+    # The JWT keeps the written form, both sides compare equal once normalized
+    assert normalize_ip_address(written) == read
+
+
+def test_epoch_seconds_round_trip():
+    column = EpochSeconds()
+    value = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    stored = column.process_bind_param(value, None)
+    assert isinstance(stored, int)
+    assert column.process_result_value(stored, None) == value
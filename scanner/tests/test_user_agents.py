@@ -0,0 +1,71 @@
+import uuid
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.db.models import user_agent
+from app.db.models.user_agent import UserAgent, _intern_user_agent
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(user_agent, "_user_agent_ids", {})
+
+
+def _count(value: str) -> int:
+    with SessionLocal() as db:
+        return db.query(UserAgent).filter(UserAgent.value == value).count()
+
+
+def test_interning_an_agent_stored_concurrently_reuses_it():
+    value = f"agent-{uuid.uuid4().hex}"
+    with SessionLocal() as first, SessionLocal() as second:
+        # The second session started work before the first stored the agent
+        second.query(UserAgent).first()
+        stored = _intern_user_agent(first, value)
+        first.commit()
+
+        interned = _intern_user_agent(second, value)
+        second.commit()
+        assert interned.id == stored.id
+    assert _count(value) == 1
+
+
+def test_pending_agents_are_deduplicated_on_flush():
+    value = f"agent-{uuid.uuid4().hex}"
+    with SessionLocal() as db:
+        db.add_all([UserAgent(value=value), UserAgent(value=value)])
+        db.commit()
+    with SessionLocal() as db:
+        db.add(UserAgent(value=value))
+        db.commit()
+    assert _count(value) == 1
+
+
+@pytest.mark.parametrize("end", ["rollback", "close"])
+def test_rolled_back_agents_are_not_cached(end):
+    value = f"agent-{uuid.uuid4().hex}"
+    db = SessionLocal()
+    _intern_user_agent(db, value)
+    db.flush()
+    getattr(db, end)()
+    assert value not in user_agent._user_agent_ids
+    assert _count(value) == 0
+
+    with SessionLocal() as db:
+        interned = _intern_user_agent(db, value)
+        db.commit()
+        assert user_agent._user_agent_ids[value] == interned.id
+    with SessionLocal() as db:
+        assert db.get(UserAgent, interned.id).value == value
+
+
+def test_savepoint_rollback_discards_pending_agents():
+    value = f"agent-{uuid.uuid4().hex}"
+    with SessionLocal() as db:
+        savepoint = db.begin_nested()
+        _intern_user_agent(db, value)
+        savepoint.rollback()
+        db.commit()
+    assert value not in user_agent._user_agent_ids
+    assert _count(value) == 0